@@ -1,163 +1,195 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import time
+import asyncio
+import httpx
+from aiolimiter import AsyncLimiter
+import lxml.html
+from lxml import etree
+import csv
+import os
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from urllib.parse import urljoin, parse_qs, urlparse
 from typing import List, Dict, Optional
-import json
+import orjson
+
+@lru_cache(maxsize=64)
+def _compile_xpath(expr: str) -> etree.XPath:
+    # Template das páginas de ideia é fixo: cada expressão compila uma única vez
+    return etree.XPath(expr)
+
+def parse_idea(html_bytes: bytes) -> Optional[Dict]:
+    # Função top-level (picklável) para rodar nos worker processes:
+    # recebe os bytes crus da página e devolve o dict da ideia
+    try:
+        tree = lxml.html.fromstring(html_bytes)
+
+        # Uma travessia C por bloco, em vez de vários soup.find por página
+        titulos = _compile_xpath("//div[@class='destaque']/h2/text()")(tree)
+        detalhes = _compile_xpath("//div[@id='detalhes']/p")(tree)
+
+        return {
+            'idea_titulo': titulos[0].strip() if titulos else '',
+            'idea_estado': detalhes[1].text_content().strip() if len(detalhes) > 1 else '',
+            'idea_departamento': detalhes[2].text_content().strip() if len(detalhes) > 2 else '',
+            'idea_demanda': detalhes[3].text_content().strip() if len(detalhes) > 3 else ''
+        }
+
+    except Exception as e:
+        logging.getLogger(__name__).warning("Erro ao extrair dados da ideia: %s", e)
+        return None
 
 class SenaiWebCrawler:
-    
-    def __init__(self, base_url: str, delay: float = 1.0):
+
+    def __init__(self, base_url: str, delay: float = 0.5, concurrency: int = 8):
         self.base_url = base_url
         self.delay = delay
-        self.session = requests.Session()
-        
+        self.concurrency = concurrency
+
         # Headers para simular um browser
-        self.session.headers.update({
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
-        })
-        
+        }
+
         # Setup logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
-    
-    def fetch_page(self: str) -> Optional[BeautifulSoup]:
+
+    async def fetch_page(self, client: httpx.AsyncClient, url: str) -> Optional[bytes]:
         try:
-            response = requests.get(self.base_url, timeout=30)
-            response.raise_for_status()
-            
-            return BeautifulSoup(response.content, 'html.parser')
-            
-        except requests.exceptions.RequestException as e:
-            self.logger.error("Erro ao acessar {url}: {e}")
+            for attempt in range(5):
+                # Token bucket limita a taxa média sem serializar as requisições
+                async with self.limiter:
+                    response = await client.get(url)
+
+                if response.status_code in (429, 503):
+                    # Respeitar Retry-After quando o servidor pedir para recuar
+                    retry_after = response.headers.get('Retry-After')
+                    backoff = float(retry_after) if retry_after and retry_after.isdigit() \
+                        else 0.5 * (2 ** attempt)
+                    self.logger.warning("HTTP %s em %s, aguardando %ss",
+                                        response.status_code, url, backoff)
+                    await asyncio.sleep(backoff)
+                    continue
+
+                response.raise_for_status()
+                return response.content
+
+            self.logger.error("Erro ao acessar %s: tentativas esgotadas", url)
             return None
-    
-    def extract_idea_data(self, soup: BeautifulSoup) -> List[Dict]:
-        ideas_data = []
-        # destaque
-        #destaque_tag = soup.select('.destaque')
-        #print(destaque_tag)
-        # detalhes
-        #detalhes_tag = soup.select('#detalhes')    
-        #print(detalhes_tag)
-        # equipe
-        equipe_tag = soup.find("div", id = "equipe")
-        # comentarios
-        comentarios_tag = soup.find("div", id = "comentarios")
-        # complementos
-        complementos_tag = soup.find("div", id = "complementos")
-        
-        print (soup.select("div.destaque > h2:nth-of-type(1)"))
-        print (soup.select('div#detalhes > p:nth-of-type(2)'))
-        try:
-            idea_data = {
-                'idea_titulo': soup.select("div.destaque > h2:nth-of-type(1)").get_text(strip=True),
-                #'idea_estado': soup.select('div#detalhes > p')[1].get_text(strip=True)#,detalhes_tag.find('p')[1].get_text(strip=True),
-                #'idea_departamento': detalhes_tag.find('p')[2].get_text(strip=True),
-                #'idea_demanda': detalhes_tag.find('p')[3].get_text(strip=True)
-            }
-
-            print(idea_data)
-            
-            #ideas_data.append(idea_data)
-            
-        except Exception as e:
-            self.logger.warning(f"Erro ao extrair dados da ideia: {e}")
-        
-        return ideas_data
-      
-    def crawl_all_pages(self, urls) -> Dict:
+
+        except httpx.HTTPError as e:
+            self.logger.error("Erro ao acessar %s: %s", url, e)
+            return None
+
+    async def fetch_and_parse(self, client: httpx.AsyncClient, url: str,
+                              pool: ProcessPoolExecutor) -> Optional[Dict]:
+        content = await self.fetch_page(client, url)
+        if content is None:
+            return None
+
+        # Parse CPU-bound sai do event loop para o pool de processos
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, parse_idea, content)
+
+    async def crawl_all_pages(self, urls) -> Dict:
         all_data = {
             'ideias': [],
             'total_paginas': 0,
             'total_ideias': 0
         }
 
-        for url in urls:
-            self.logger.info(f" URL {url}")
-            self.base_url = url
-            
-            # Fetch da página atual
-            soup = self.fetch_page()
-            if not soup:
-                self.logger.error(f"Não foi possível acessar a página {url}")
-
-            # Extrair dados das ideias
-            ideas_data = self.extract_idea_data(soup)
-            if not ideas_data:
-                self.logger.info(f"Nenhuma Ideia encontrada na página {url}")
-            
-            all_data['ideias'].extend(ideas_data)
-            
-            # Delay entre requisições
-            time.sleep(self.delay)
-            
-            all_data['total_ideias'] = len(all_data['ideias'])
-            
+        # Mesma taxa média do sleep por requisição, mas com N RTTs sobrepostos
+        self.limiter = AsyncLimiter(self.concurrency / self.delay, time_period=1)
+
+        # HTTP/2 multiplexa os streams em poucas conexões TLS com o mesmo host
+        limits = httpx.Limits(max_connections=8, max_keepalive_connections=8)
+
+        # Pré-aloca pelo total de URLs: index-assign evita realocação da lista
+        # e mantém a ordem de entrada mesmo com conclusão fora de ordem
+        results: List[Optional[Dict]] = [None] * len(urls)
+
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+            async with httpx.AsyncClient(http2=True, headers=self.headers,
+                                         limits=limits, timeout=30) as client:
+
+                async def crawl_one(index: int, url: str):
+                    results[index] = await self.fetch_and_parse(client, url, pool)
+
+                tasks = [asyncio.create_task(crawl_one(i, url))
+                         for i, url in enumerate(urls)]
+                await asyncio.gather(*tasks)
+
+        all_data['ideias'] = [r for r in results if r]
+
+        faltantes = len(results) - len(all_data['ideias'])
+        if faltantes:
+            self.logger.info("%s páginas sem ideia extraída", faltantes)
+
+        all_data['total_ideias'] = len(all_data['ideias'])
+
         return all_data
-    
+
     def save_to_files(self, data: Dict, base_filename: str = 'senai_data'):
         try:
             # Salvar em JSON
             json_filename = f"{base_filename}.json"
-            with open(json_filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            self.logger.info("Dados salvos em {json_filename}")
-            
+            with open(json_filename, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            self.logger.info("Dados salvos em %s", json_filename)
+
             # Salvar ideias em CSV
             if data['ideias']:
                 csv_filename = f"{base_filename}_ideias.csv"
-                df_users = pd.DataFrame(data['ideias'])
-                df_users.to_csv(csv_filename, index=False, encoding='utf-8')
-                self.logger.info("Ideias salvas em {csv_filename}")
-                
+                with open(csv_filename, 'w', newline='', encoding='utf-8') as f:
+                    writer = csv.DictWriter(f, fieldnames=list(data['ideias'][0].keys()))
+                    writer.writeheader()
+                    writer.writerows(data['ideias'])
+                self.logger.info("Ideias salvas em %s", csv_filename)
+
         except Exception as e:
-            self.logger.error("Erro ao salvar arquivos: {e}")
+            self.logger.error("Erro ao salvar arquivos: %s", e)
 
 def json_extract_links(arquivo_json: str, chaves: List[str] = None) -> Dict[str, List[str]]:
     try:
-        with open(arquivo_json, 'r', encoding='utf-8') as file:
-            ideia_list = json.load(file)
-            ideia_links = []
-
-            for ideia in ideia_list['ideias']:
-                ideia_links.append(ideia['idea_url'])
-
-            return ideia_links
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        print("Erro ao processar arquivo: {e}")
-        return {}
+        with open(arquivo_json, 'rb') as file:
+            ideia_list = orjson.loads(file.read())
+            # Deduplica preservando a ordem (listagens sobrepostas repetem URLs)
+            return list(dict.fromkeys(ideia['idea_url'] for ideia in ideia_list['ideias']))
+    except (FileNotFoundError, orjson.JSONDecodeError) as e:
+        logging.getLogger(__name__).error("Erro ao processar arquivo: %s", e)
+        return []
 
 def main():
     # URL da ideia
-    urls = json_extract_links('senai1885_ideia_links_reduce.json');
-    print(urls)
+    urls = json_extract_links('senai1885_ideia_links_reduce.json')
+
+    # Dump das URLs só quando debug estiver ligado (evita I/O de stdout à toa)
+    logger = logging.getLogger(__name__)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("URLs carregadas: %s", urls)
 
     # Inicializar crawler
     crawler = SenaiWebCrawler('', delay=3) # 545 pag totais
     print("🚀 Iniciando extração de dados da plataforma SENAI...")
 
     # Executar crawling
-    data = crawler.crawl_all_pages(urls)
-    
+    data = asyncio.run(crawler.crawl_all_pages(urls))
+
     # Exibir resultados
     print("\n📊 Resultados da Extração:")
-    print("Total de páginas processadas: {data['total_paginas']}")
-    print("Total de ideias encontradas: {data['total_ideias']}")
-    
+    print(f"Total de páginas processadas: {data['total_paginas']}")
+    print(f"Total de ideias encontradas: {data['total_ideias']}")
+
     # Salvar dados
     print("\n💾 Salvando dados...")
     crawler.save_to_files(data, 'senai_desafio_1885')
-    
+
     print("\n✅ Extração concluída com sucesso!")
-    
+
     return data
 
 if __name__ == "__main__":
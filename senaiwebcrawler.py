@@ -1,26 +1,47 @@
+import csv
+import socket
 import requests
-from bs4 import BeautifulSoup
-import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import lxml.html
+from lxml import etree
 import time
 import logging
 from urllib.parse import urljoin, parse_qs, urlparse
 from typing import List, Dict, Optional
-import json
+import orjson
 
 class SenaiWebCrawler:
     
-    def __init__(self, base_url: str, max_pages: int, delay: float = 1.0):
+    def __init__(self, base_url: str, max_pages: int, delay: float = 0.5):
         self.base_url = base_url
         self.delay = delay
         self.max_pages = max_pages
         self.session = requests.Session()
-        
+
+        # Host único: um pool com muitos sockets keep-alive reaproveitados;
+        # backoff exponencial e Retry-After cuidam de 429/5xx
+        retries = Retry(total=5, backoff_factor=0.5,
+                        status_forcelist=[429, 500, 502, 503, 504],
+                        respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=32,
+                              pool_block=False, max_retries=retries)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # Aquecer o cache de DNS do resolver antes do crawl
+        host = urlparse(base_url).hostname
+        if host:
+            try:
+                socket.getaddrinfo(host, 443)
+            except socket.gaierror:
+                pass
+
         # Headers para simular um browser
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         })
@@ -29,136 +50,130 @@ class SenaiWebCrawler:
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
     
-    def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
+    def fetch_page(self, url: str) -> Optional[lxml.html.HtmlElement]:
         try:
             response = self.session.get(url, timeout=30)
             response.raise_for_status()
-            
-            return BeautifulSoup(response.content, 'html.parser')
-            
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"Erro ao acessar {url}: {e}")
+
+            return lxml.html.fromstring(response.content)
+
+        except (requests.exceptions.RequestException, etree.ParserError) as e:
+            self.logger.error("Erro ao acessar %s: %s", url, e)
             return None
-    
-    def extract_idea_data(self, soup: BeautifulSoup) -> List[Dict]:
+
+    def extract_idea_data(self, tree: lxml.html.HtmlElement) -> List[Dict]:
         ideas_data = []
-        
-        # titulo-18
-        ideas_tag = soup.find_all('h3', class_=lambda value: value == 'titulo-18')
-        
-        for link in ideas_tag:
-            try:
-                idea_data = {
-                    'idea_titulo': link.find('a').get_text(strip=True),
-                    'idea_url': link.find('a')['href'],
-                }
-                
-                ideas_data.append(idea_data)
-                
-            except Exception as e:
-                self.logger.warning(f"Erro ao extrair dados da ideia: {e}")
+
+        # Um único passo XPath em C devolve os pares (título, href) dos cards
+        for link in tree.xpath("//h3[@class='titulo-18']/a"):
+            href = link.get('href')
+            if not href:
+                self.logger.warning("Card de ideia sem link, ignorando")
                 continue
-        
+
+            ideas_data.append({
+                'idea_titulo': link.text_content().strip(),
+                'idea_url': href,
+            })
+
         return ideas_data
-    
-    def find_next_page(self, soup: BeautifulSoup, current_page: int) -> Optional[str]:
+
+    def find_next_page(self, tree: lxml.html.HtmlElement, current_page: int) -> Optional[str]:
         """
         Encontra a próxima página se existir
-        
+
         Args:
-            soup: BeautifulSoup da página atual
+            tree: Árvore lxml da página atual
             current_page: Número da página atual
-            
+
         Returns:
             URL da próxima página ou None
         """
         # Procurar por links de paginação
-        pagination_links = soup.find_all('a', href=lambda x: x and 'page=' in x)
-        
+        pagination_links = tree.xpath("//a[contains(@href, 'page=')]/@href")
+
         if pagination_links:
             # Buscar página seguinte
             next_page = current_page + 1
-            for link in pagination_links:
-                href = link.get('href')
+            for href in pagination_links:
                 if f'page={next_page}' in href:
                     return urljoin(self.base_url, href)
         
-        # Alternativa: tentar construir URL da próxima página
-        try:
-            parsed_url = urlparse(self.base_url)
-            base_without_params = f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
-            next_url = f"{base_without_params}?page={current_page + 1}"
-            
-            # Verificar se a próxima página existe
-            test_soup = self.fetch_page(next_url)
-            if test_soup and self.extract_user_data(test_soup):
-                return next_url
-        except:
-            pass
-        
-        return None
+        # Alternativa: construir URL da próxima página sem buscá-la aqui —
+        # o loop principal já encerra quando a extração volta vazia
+        parsed_url = urlparse(self.base_url)
+        base_without_params = f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
+        return f"{base_without_params}?page={current_page + 1}"
     
-    def crawl_all_pages(self) -> Dict:
+    def crawl_all_pages(self, base_filename: str = 'senai_data') -> Dict:
         all_data = {
-            'ideias': [],
             'total_paginas': 0,
             'total_ideias': 0
         }
-        
+
         current_page = 1
         current_url = self.base_url
-        
-        while current_page <= self.max_pages:
-            self.logger.info(f"Página {current_page}, URL {current_url}")
-            
-            # Fetch da página atual
-            soup = self.fetch_page(current_url)
-            if not soup:
-                self.logger.error(f"Não foi possível acessar a página {current_page}")
-                break
-
-            # Extrair dados das ideias
-            ideas_data = self.extract_idea_data(soup)
-            if not ideas_data:
-                self.logger.info(f"Nenhuma Ideia encontrada na página {current_page}")
-                break
-            
-            all_data['ideias'].extend(ideas_data)
-            all_data['total_paginas'] = current_page
-            
-            # Buscar próxima página
-            next_url = self.find_next_page(soup, current_page)
-            if not next_url:
-                self.logger.info("Não há mais páginas para processar")
-                break
-            
-            current_url = next_url
-            current_page += 1
-            
-            # Delay entre requisições
-            time.sleep(self.delay)
-        
-        all_data['total_ideias'] = len(all_data['ideias'])
-        
+
+        # Saída incremental: NDJSON + CSV gravados página a página, sem
+        # acumular todas as ideias em memória (e sem perder tudo num crash)
+        ndjson_filename = f"{base_filename}.ndjson"
+        csv_filename = f"{base_filename}_ideias.csv"
+
+        with open(ndjson_filename, 'wb') as ndjson_file, \
+             open(csv_filename, 'w', newline='', encoding='utf-8') as csv_file:
+            csv_writer = csv.DictWriter(csv_file, fieldnames=['idea_titulo', 'idea_url'])
+            csv_writer.writeheader()
+
+            while current_page <= self.max_pages:
+                self.logger.info("Página %s, URL %s", current_page, current_url)
+
+                # Fetch da página atual
+                tree = self.fetch_page(current_url)
+                if tree is None:
+                    self.logger.error("Não foi possível acessar a página %s", current_page)
+                    break
+
+                # Extrair dados das ideias
+                ideas_data = self.extract_idea_data(tree)
+                if not ideas_data:
+                    self.logger.info("Nenhuma Ideia encontrada na página %s", current_page)
+                    break
+
+                for idea_data in ideas_data:
+                    ndjson_file.write(orjson.dumps(idea_data) + b'\n')
+                csv_writer.writerows(ideas_data)
+                ndjson_file.flush()
+                csv_file.flush()
+
+                all_data['total_ideias'] += len(ideas_data)
+                all_data['total_paginas'] = current_page
+
+                # Buscar próxima página
+                next_url = self.find_next_page(tree, current_page)
+                if not next_url:
+                    self.logger.info("Não há mais páginas para processar")
+                    break
+
+                current_url = next_url
+                current_page += 1
+
+                # Delay entre requisições
+                time.sleep(self.delay)
+
+        self.logger.info("Ideias salvas em %s e %s", ndjson_filename, csv_filename)
+
         return all_data
-    
+
     def save_to_files(self, data: Dict, base_filename: str = 'senai_data'):
         try:
-            # Salvar em JSON
+            # Salvar resumo em JSON (as ideias já foram gravadas durante o crawl)
             json_filename = f"{base_filename}.json"
-            with open(json_filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            self.logger.info(f"Dados salvos em {json_filename}")
-            
-            # Salvar ideias em CSV
-            if data['ideias']:
-                csv_filename = f"{base_filename}_ideias.csv"
-                df_users = pd.DataFrame(data['ideias'])
-                df_users.to_csv(csv_filename, index=False, encoding='utf-8')
-                self.logger.info(f"Ideias salvas em {csv_filename}")
-                
+            with open(json_filename, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            self.logger.info("Dados salvos em %s", json_filename)
+
         except Exception as e:
-            self.logger.error(f"Erro ao salvar arquivos: {e}")
+            self.logger.error("Erro ao salvar arquivos: %s", e)
 
 def main():
     # URL do desafio
@@ -168,8 +183,8 @@ def main():
     crawler = SenaiWebCrawler(url, max_pages=5, delay=1.5) # 545 pag totais
     print("🚀 Iniciando extração de dados da plataforma SENAI...")
 
-    # Executar crawling
-    data = crawler.crawl_all_pages()
+    # Executar crawling (ideias gravadas incrementalmente em NDJSON/CSV)
+    data = crawler.crawl_all_pages('senai_desafio_1885')
     
     # Exibir resultados
     print(f"\n📊 Resultados da Extração:")